@@ -30,4 +30,14 @@ export class Logger {
     }
 }
 
-export const log = new Logger(LogLevel.Debug);
+function getLogLevel(): LogLevel {
+    const level = process.env.LOG_LEVEL;
+    if (level) {
+        const name = level.charAt(0).toUpperCase() + level.slice(1).toLowerCase();
+        const value = LogLevel[name as keyof typeof LogLevel];
+        if (typeof value === "number") return value;
+    }
+    return process.env.NODE_ENV === "production" ? LogLevel.Info : LogLevel.Debug;
+}
+
+export const log = new Logger(getLogLevel());
@@ -1,9 +1,21 @@
 
 import { TweetStream, TwitterApi, TwitterV2IncludesHelper, UserSearchV1Paginator } from 'twitter-api-v2';
 import { log } from '~/log.server';
-import { driver } from "~/neo4j.server";
+import { driver, database } from "~/neo4j.server";
 import { Record } from 'neo4j-driver'
 
+// Field lists requested from the Twitter API, built once and shared by every call
+const ALL_TWEET_FIELDS = 'attachments,author_id,context_annotations,conversation_id,created_at,entities,geo,id,in_reply_to_user_id,lang,public_metrics,text,possibly_sensitive,referenced_tweets,reply_settings,source,withheld';
+const ALL_USER_FIELDS = 'created_at,description,entities,id,location,name,pinned_tweet_id,profile_image_url,protected,public_metrics,url,username,verified,withheld';
+// Timelines only request what writeTweetsFrom and its includes actually store
+const TIMELINE_PARAMETERS = Object.freeze({
+    'expansions': 'author_id,in_reply_to_user_id,referenced_tweets.id,referenced_tweets.id.author_id,entities.mentions.username,attachments.media_keys',
+    'tweet.fields': 'attachments,author_id,conversation_id,created_at,entities,id,in_reply_to_user_id,lang,public_metrics,text,possibly_sensitive,referenced_tweets,reply_settings',
+    'user.fields': 'created_at,description,id,location,name,pinned_tweet_id,profile_image_url,protected,public_metrics,url,username,verified',
+    'media.fields': 'alt_text,duration_ms,height,media_key,preview_image_url,type,url,width,public_metrics',
+    'max_results': 100,
+} as const);
+
 export function flattenTwitterUserPublicMetrics(data: Array<any>) {
     for (const obj of data) {
         // obj.username = obj.username.toLowerCase();
@@ -13,19 +25,7 @@ export function flattenTwitterUserPublicMetrics(data: Array<any>) {
         obj["public_metrics.listed_count"] = obj.public_metrics.listed_count;
         delete obj.public_metrics;
         delete obj.entities;
-    }
-    return data;
-}
-
-export function flattenTweetPublicMetrics(data: Array<any>) {
-    for (const obj of data) {
-        // obj.username = obj.us / ername.toLowerCase();
-        obj["public_metrics.retweet_count"] = obj.public_metrics.retweet_count;
-        obj["public_metrics.reply_count"] = obj.public_metrics.reply_count;
-        obj["public_metrics.like_count"] = obj.public_metrics.like_count;
-        obj["public_metrics.quote_count"] = obj.public_metrics.quote_count;
-        delete obj.public_metrics;
-        // delete obj.entities;
+        delete obj.withheld;
     }
     return data;
 }
@@ -34,8 +34,8 @@ export async function getUserFromTwitter(api: any, username: string) {
     const { data: user } = await api.v2.userByUsername(
         username,
         {
-            "tweet.fields": "attachments,author_id,context_annotations,conversation_id,created_at,entities,geo,id,in_reply_to_user_id,lang,public_metrics,text,possibly_sensitive,referenced_tweets,reply_settings,source,withheld",
-            "user.fields": "created_at,description,entities,id,location,name,pinned_tweet_id,profile_image_url,protected,public_metrics,url,username,verified,withheld",
+            "tweet.fields": ALL_TWEET_FIELDS,
+            "user.fields": ALL_USER_FIELDS,
         }
     );
     if (user) {
@@ -46,7 +46,7 @@ export async function getUserFromTwitter(api: any, username: string) {
 
 
 export async function getTweet(tweetId: string) {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     const res = await session.readTransaction((tx: any) => {
         return tx.run(`
@@ -81,7 +81,7 @@ export async function getTweet(tweetId: string) {
 }
 
 export async function getStreams() {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     const res = await session.readTransaction((tx: any) => {
         return tx.run(`
@@ -97,33 +97,23 @@ export async function getStreams() {
 }
 
 export async function getStreamByName(name: string) {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
+    // Fetch the stream and its seed users in a single round-trip
     const streamRes = await session.readTransaction((tx: any) => {
         return tx.run(`
         MATCH (s:Stream {name: $name} )
-        RETURN s
+        OPTIONAL MATCH (s)-[:CONTAINS]->(u:User)
+        RETURN s, collect(u) AS seedUsers
         LIMIT 1;
         `,
             { name })
     })
     let stream = null;
+    let seedUsers: any = [];
     if (streamRes.records.length > 0) {
         stream = streamRes.records[0].get("s");
-    }
-    let seedUsers: any = [];
-    if (stream) {
-        let seedUsersRes = await session.readTransaction((tx: any) => {
-            return tx.run(`
-            MATCH (s:Stream {name: $name} )-[:CONTAINS]->(u:User)
-            RETURN u`,
-                { name })
-        })
-        if (seedUsersRes.records.length > 0) {
-            seedUsers = seedUsersRes.records.map((row: Record) => {
-                return row.get('u')
-            })
-        }
+        seedUsers = streamRes.records[0].get("seedUsers");
     }
 
     await session.close()
@@ -131,7 +121,7 @@ export async function getStreamByName(name: string) {
 }
 
 export async function createStream(name: string, startTime: string, endTime: string, username: string) {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     let streamData = {
         name,
@@ -158,7 +148,7 @@ export async function createStream(name: string, startTime: string, endTime: str
 }
 
 export async function deleteStreamByName(name: string) {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     const res = await session.readTransaction((tx: any) => {
         return tx.run(`
@@ -169,7 +159,7 @@ export async function deleteStreamByName(name: string) {
 }
 
 export async function removeSeedUserFromStream(streamName: string, username: string) {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     const res = await session.writeTransaction((tx: any) => {
         return tx.run(`
@@ -188,33 +178,26 @@ async function getTweetsFromAuthorId(
     const tweets = await api.v2.userTimeline(
         id,
         {
-            'expansions': 'author_id,in_reply_to_user_id,referenced_tweets.id,referenced_tweets.id.author_id,entities.mentions.username,attachments.poll_ids,attachments.media_keys,geo.place_id',
-            'tweet.fields': 'attachments,author_id,context_annotations,conversation_id,created_at,entities,geo,id,in_reply_to_user_id,lang,public_metrics,text,possibly_sensitive,referenced_tweets,reply_settings,source,withheld',
-            'user.fields': 'created_at,description,entities,id,location,name,pinned_tweet_id,profile_image_url,protected,public_metrics,url,username,verified,withheld',
-            'media.fields': 'alt_text,duration_ms,height,media_key,preview_image_url,type,url,width,public_metrics',
-            'poll.fields': 'duration_minutes,end_datetime,id,options,voting_status',
-            'place.fields': 'contained_within,country,country_code,full_name,geo,id,name,place_type',
-            'max_results': 100,
+            ...TIMELINE_PARAMETERS,
             'end_time': endTime,
             'start_time': startTime
         }
     );
     while (!tweets.done) {
-        console.log(tweets.data.data.length);
         await tweets.fetchNext();
     }
+    log.debug(`fetched ${tweets.data.data?.length ?? 0} tweets from ${id}`);
     return tweets;
 }
 
 async function streamContainsUser(username: string, streamName: string) {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     const res = await session.writeTransaction((tx: any) => {
         return tx.run(`
         MATCH (u:User {username: $username}) 
         MATCH (s:Stream {name: $streamName})
-        MERGE (s)-[:CONTAINS]->(u)
-        RETURN s,u`,
+        MERGE (s)-[:CONTAINS]->(u)`,
             { username, streamName }
         )
     })
@@ -222,7 +205,7 @@ async function streamContainsUser(username: string, streamName: string) {
 }
 
 async function getSavedFollows(username: string) {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     const res = await session.writeTransaction((tx: any) => {
         return tx.run(`
@@ -238,137 +221,150 @@ async function getSavedFollows(username: string) {
 }
 
 async function addUsersFollowedBy(username: string, users: any) {
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     const res = await session.writeTransaction((tx: any) => {
         return tx.run(`
             UNWIND $users AS u
             MATCH (followerUser:User {username: $followerUsername})
-            MERGE (followedUser:User {username: u.username})
-            SET followedUser = u
+            MERGE (followedUser:User {id: u.id})
+            SET followedUser = u {.*, username: toLower(u.username), public_metrics: null, entities: null, withheld: null},
+                followedUser.`public_metrics.followers_count` = u.public_metrics.followers_count,
+                followedUser.`public_metrics.following_count` = u.public_metrics.following_count,
+                followedUser.`public_metrics.tweet_count` = u.public_metrics.tweet_count,
+                followedUser.`public_metrics.listed_count` = u.public_metrics.listed_count
             MERGE (followerUser)-[r:FOLLOWS]->(followedUser)
-            RETURN followedUser
             `,
             { users: users, followerUsername: username }
         )
     })
-    const followed = res.records.map((row: any) => {
-        return row.get("followedUser")
-    })
     await session.close()
-    return followed;
 }
 
-async function addUsers(users: any) {
-    const session = driver.session()
-    // Create a node within a write transaction
-    const res = await session.writeTransaction((tx: any) => {
-        return tx.run(`
-            UNWIND $users AS u
-            MERGE (user:User {username: u.username})
-            SET user = u
-            RETURN user
-            `,
-            { users: users }
-        )
-    })
-    const followed = res.records.map((row: any) => {
-        return row.get("user")
-    })
-    await session.close()
-    return followed;
+function writeUsers(tx: any, users: any) {
+    return tx.run(`
+        UNWIND $users AS u
+        MERGE (user:User {id: u.id})
+        SET user = u {.*, username: toLower(u.username), public_metrics: null, entities: null, withheld: null},
+            user.`public_metrics.followers_count` = u.public_metrics.followers_count,
+            user.`public_metrics.following_count` = u.public_metrics.following_count,
+            user.`public_metrics.tweet_count` = u.public_metrics.tweet_count,
+            user.`public_metrics.listed_count` = u.public_metrics.listed_count
+        `,
+        { users: users }
+    )
 }
 
-export function flattenMediaPublicMetrics(data: Array<any>) {
-    for (const obj of data) {
-        // obj.username = obj.username.toLowerCase();
-        if (obj.public_metrics) {
-            obj["public_metrics.view_count"] = obj.public_metrics.view_count
-        }
-        delete obj.public_metrics;
-    }
-    return data;
+function writeTweetMedia(tx: any, media: any) {
+    return tx.run(`
+        UNWIND $media AS m
+        MERGE (mediaNode:Media {media_key: m.media_key})
+        SET mediaNode = m {.*, public_metrics: null},
+            mediaNode.`public_metrics.view_count` = m.public_metrics.view_count
+        `,
+        { media: media }
+    )
 }
 
-async function addTweetMedia(media: any) {
-    const session = driver.session()
-    // Create a node within a write transaction
-    let flatMedia = flattenMediaPublicMetrics(media);
-    console.log("HERE IS THE MEDIA")
-    console.log(media);
-    const res = await session.writeTransaction((tx: any) => {
-        return tx.run(`
-            UNWIND $media AS m
-            MERGE (mediaNode:Media {media_key: m.media_key})
-            SET mediaNode = m
-            RETURN mediaNode
-            `,
-            { media: flatMedia }
+function writeTweetsFrom(tx: any, tweets: any) {
+    return tx.run(`
+        UNWIND $tweets AS t
+        MERGE (tweet:Tweet {id: t.id})
+        SET tweet.id = t.id,
+            tweet.conversation_id = t.conversation_id,
+            tweet.possibly_sensitive = t.possibly_sensitive,
+            tweet.in_reply_to_user_id = t.in_reply_to_user_id,
+            tweet.lang = t.lang,
+            tweet.text = t.text,
+            tweet.created_at = t.created_at,
+            tweet.reply_settings = t.reply_settings,
+            tweet.`public_metrics.retweet_count` = t.public_metrics.retweet_count,
+            tweet.`public_metrics.reply_count` = t.public_metrics.reply_count,
+            tweet.`public_metrics.like_count` = t.public_metrics.like_count,
+            tweet.`public_metrics.quote_count` = t.public_metrics.quote_count
+
+        MERGE (user:User {id: t.author_id})
+
+        MERGE (user)-[:POSTED]->(tweet)
+
+        FOREACH (m IN [m IN t.entities.mentions WHERE m.id IS NOT NULL] |
+            MERGE (mentioned:User {id:m.id})
+            ON CREATE SET mentioned.username = toLower(m.username)
+            MERGE (tweet)-[:MENTIONED]->(mentioned)
         )
-    })
-    const followed = res.records.map((row: any) => {
-        return row.get("mediaNode")
-    })
-    await session.close()
-    return followed;
-}
-
-async function addTweetsFrom(tweets: any) {
-    const session = driver.session()
-    // Create a node within a write transaction
-    const res = await session.writeTransaction((tx: any) => {
-        return tx.run(`
-            UNWIND $tweets AS t
-            MERGE (tweet:Tweet {id: t.id})
-            SET tweet.id = t.id,
-                tweet.conversation_id = t.conversation_id,
-                tweet.possibly_sensitive = t.possibly_sensitive,
-                tweet.in_reply_to_user_id = t.in_reply_to_user_id,
-                tweet.lang = t.lang,
-                tweet.text = t.text,
-                tweet.created_at = t.created_at,
-                tweet.reply_settings = t.reply_settings
-
-            MERGE (user:User {id: t.author_id})
-
-            MERGE (user)-[:POSTED]->(tweet)
-
-            FOREACH (m IN t.entities.mentions |
-                MERGE (mentioned:User {username:m.username})
-                MERGE (tweet)-[:MENTIONED]->(mentioned)
-            )
-            FOREACH (u IN t.entities.urls |
-                MERGE (url:Link {url:u.expanded_url})
-                MERGE (tweet)-[:LINKED]->(url)
-            )
-            FOREACH (a IN t.entities.annotations |
-                MERGE (annotation:Annotation {probability:a.probability, type:a.type, normalized_text:a.normalized_text})
-                MERGE (tweet)-[:ANNOTATED]->(annotation)
-            )
-            FOREACH (h IN t.entities.hashtags |
-                MERGE (hashtag:Hashtag {tag:h.tag})
-                MERGE (tweet)-[:TAG]->(hashtag)
-            )
-            FOREACH (c IN t.entities.cashtags |
-                MERGE (cashtag:Cashtag {tag:c.tag})
-                MERGE (tweet)-[:TAG]->(cashtag)
-            )
-            FOREACH (a IN t.attachments |
-                FOREACH (media_key in a.media_keys |
-                    MERGE (media:Media {media_key:media_key})
-                    MERGE (tweet)-[:ATTACHED]->(media)
-                )
-            )
-            FOREACH (r IN t.referenced_tweets |
-                MERGE (ref_t:Tweet {id:r.id})
-                MERGE (tweet)-[:REFERENCED{type:r.type}]->(ref_t)
+        FOREACH (u IN t.entities.urls |
+            MERGE (url:Link {url:u.expanded_url})
+            MERGE (tweet)-[:LINKED]->(url)
+        )
+        FOREACH (a IN t.entities.annotations |
+            MERGE (annotation:Annotation {probability:a.probability, type:a.type, normalized_text:a.normalized_text})
+            MERGE (tweet)-[:ANNOTATED]->(annotation)
+        )
+        FOREACH (h IN t.entities.hashtags |
+            MERGE (hashtag:Hashtag {tag:h.tag})
+            MERGE (tweet)-[:TAG]->(hashtag)
+        )
+        FOREACH (c IN t.entities.cashtags |
+            MERGE (cashtag:Cashtag {tag:c.tag})
+            MERGE (tweet)-[:TAG]->(cashtag)
+        )
+        FOREACH (a IN t.attachments |
+            FOREACH (media_key in a.media_keys |
+                MERGE (media:Media {media_key:media_key})
+                MERGE (tweet)-[:ATTACHED]->(media)
             )
-            `,
-            { tweets: tweets }
         )
+        FOREACH (r IN t.referenced_tweets |
+            MERGE (ref_t:Tweet {id:r.id})
+            MERGE (tweet)-[:REFERENCED{type:r.type}]->(ref_t)
+        )
+        `,
+        { tweets: tweets }
+    )
+}
+
+// Writes the tweets of a seed user along with the users, media and ref tweets
+// included with them in a single transaction, so the whole batch costs one commit
+async function addTweetsWithIncludes(users: any, media: any, refTweets: any, tweets: any) {
+    const session = driver.session({ database })
+    await session.writeTransaction(async (tx: any) => {
+        await writeUsers(tx, users)
+        await writeTweetMedia(tx, media)
+        await writeTweetsFrom(tx, refTweets)
+        if (tweets.length > 0) {
+            await writeTweetsFrom(tx, tweets)
+        }
     })
     await session.close()
-};
+}
+
+async function syncUsersFollowedBy(api: TwitterApi, user: any) {
+    // Check to see if follows have been saved for this seed user
+    let savedFollowsOfUser = await getSavedFollows(user.properties.username);
+    if (savedFollowsOfUser.length == user.properties["public_metrics.following_count"]) {
+        log.debug(`Looks like we have already saved the ${savedFollowsOfUser.length} users followed by '${user.properties.username}'`)
+    } else {
+
+        log.debug(`We have ${savedFollowsOfUser.length} users followed by '${user.properties.username}', but twitter shows ${user.properties["public_metrics.following_count"]}`)
+        console.log(`PULLING USERS FOLLOWED BY '${user.properties.username}`);
+        // Get accounts followed by seed user
+        const following = await api.v2.following(
+            user.properties.id,
+            {
+                'tweet.fields': ALL_TWEET_FIELDS,
+                'user.fields': ALL_USER_FIELDS,
+                'max_results': 1000,
+                "asPaginator": true
+            }
+        );
+
+        while (!following.done) { await following.fetchNext(); }
+        console.log(`fetched ${following.data.data.length} accounts followed by '${user.properties.username}'`);
+        console.time("addUsersFollowedBy")
+        await addUsersFollowedBy(user.properties.username, following.data.data)
+        console.timeEnd("addUsersFollowedBy")
+    }
+}
 
 export async function addSeedUserToStream(
     api: TwitterApi,
@@ -381,68 +377,31 @@ export async function addSeedUserToStream(
         // Add new seedUsers relation to Stream
         await streamContainsUser(user.properties.username, stream.properties.name)
 
-        // Check to see if follows have been saved for this seed user
-        let savedFollowsOfUser = await getSavedFollows(user.properties.username);
-        if (savedFollowsOfUser.length == user.properties["public_metrics.following_count"]) {
-            log.debug(`Looks like we have already saved the ${savedFollowsOfUser.length} users followed by '${user.properties.username}'`)
-        } else {
-
-            log.debug(`We have ${savedFollowsOfUser.length} users followed by '${user.properties.username}', but twitter shows ${user.properties["public_metrics.following_count"]}`)
-            console.log(`PULLING USERS FOLLOWED BY '${user.properties.username}`);
-            // Get accounts followed by seed user
-            const following = await api.v2.following(
+        // Sync the accounts followed by the seed user while pulling the tweets
+        // from stream's date Range, the two don't depend on each other
+        const [, tweets] = await Promise.all([
+            syncUsersFollowedBy(api, user),
+            getTweetsFromAuthorId(
+                api,
                 user.properties.id,
-                {
-                    'tweet.fields': 'attachments,author_id,context_annotations,conversation_id,created_at,entities,geo,id,in_reply_to_user_id,lang,public_metrics,text,possibly_sensitive,referenced_tweets,reply_settings,source,withheld',
-                    'user.fields': 'created_at,description,entities,id,location,name,pinned_tweet_id,profile_image_url,protected,public_metrics,url,username,verified,withheld',
-                    'max_results': 1000,
-                    "asPaginator": true
-                }
-            );
-
-            while (!following.done) { await following.fetchNext(); }
-            console.log(`fetched ${following.data.data.length} accounts followed by '${user.properties.username}'`);
-            let newUsers = following.data.data.map((u: any) => {
-                return flattenTwitterUserPublicMetrics([u])[0]
-            })
-            console.time("addUsersFollowedBy")
-            await addUsersFollowedBy(user.properties.username, newUsers)
-            console.timeEnd("addUsersFollowedBy")
-        }
-
-        // Add the tweets from stream's date Range to the DB to build a feed
-        let tweets = await getTweetsFromAuthorId(
-            api,
-            user.properties.id,
-            stream.properties.startTime,
-            stream.properties.endTime
-        );
+                stream.properties.startTime,
+                stream.properties.endTime
+            ),
+        ]);
 
         // I can do more fun stuff with this, like get the media of specific tweets: https://github.com/PLhery/node-twitter-api-v2/blob/master/doc/helpers.md
         const includes = new TwitterV2IncludesHelper(tweets);
-        // Add included users
-        console.log(`pushing ${includes.users.length} users included in tweets from ${user.properties.name}`)
-        console.time("addUsers")
-        await addUsers(flattenTwitterUserPublicMetrics(includes.users))
-        console.timeEnd("addUsers")
-
-        // Add media 
-        console.log(`pushing ${includes.media.length} media objects included in tweets from ${user.properties.name}`)
-        console.time("addTweetMedia")
-        await addTweetMedia(includes.media);
-        console.timeEnd("addTweetMedia")
-
-        // Add ref/included tweets
-        console.log(`pushing ${includes.tweets.length} ref tweets to graph from ${user.properties.name}`)
-        await addTweetsFrom(flattenTweetPublicMetrics(includes.tweets));
-
-        // Add the tweets themselves 
-        if (tweets.data.data.length > 0) {
-            console.log(`pushing ${tweets.data.data.length} tweets to graph from ${user.properties.name}`)
-            console.time("addTweetsFrom")
-            await addTweetsFrom(flattenTweetPublicMetrics(tweets.data.data));
-            console.timeEnd("addTweetsFrom")
-        }
+        // a timeline with no tweets in the stream's window comes back without data
+        const timeline = tweets.data.data ?? [];
+        console.log(`pushing ${includes.users.length} users, ${includes.media.length} media objects, ${includes.tweets.length} ref tweets and ${timeline.length} tweets to graph from ${user.properties.name}`)
+        console.time("addTweetsWithIncludes")
+        await addTweetsWithIncludes(
+            includes.users,
+            includes.media,
+            includes.tweets,
+            timeline,
+        );
+        console.timeEnd("addTweetsWithIncludes")
         return tweets;
 
     } catch (e) {
@@ -455,8 +414,8 @@ async function getTweetsFromUsername(id: string) {
     const tweets = await api.v2.userTimeline(
         id,
         {
-            'tweet.fields': 'attachments,author_id,context_annotations,conversation_id,created_at,entities,geo,id,in_reply_to_user_id,lang,public_metrics,text,possibly_sensitive,referenced_tweets,reply_settings,source,withheld',
-            'user.fields': 'created_at,description,entities,id,location,name,pinned_tweet_id,profile_image_url,protected,public_metrics,url,username,verified,withheld',
+            'tweet.fields': ALL_TWEET_FIELDS,
+            'user.fields': ALL_USER_FIELDS,
             'max_results': 1000,
         }
     )
@@ -475,7 +434,7 @@ async function getTweetsFromUsername(id: string) {
 
 export async function getStreamTweets(name: string, startTime: string, endTime: string) {
     //THIS EXCLUDES RETWEETS RIGHT NOW
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
     const res = await session.readTransaction((tx: any) => {
         return tx.run(`
@@ -502,17 +461,16 @@ export async function getStreamTweets(name: string, startTime: string, endTime:
 
 export async function getStreamRecommendedUsers(name: string) {
     //THIS EXCLUDES RETWEETS RIGHT NOW
-    const session = driver.session()
+    const session = driver.session({ database })
     // Create a node within a write transaction
-    // super useful for this query: https://neo4j.com/developer/kb/performing-match-intersection/
     const res = await session.executeRead((tx: any) => {
+        // count how many seed users follow each account, returned as the
+        // {item, count} pairs the stream loader expects
         return tx.run(`
-            MATCH (s:Stream {name: $name})-[:CONTAINS]->(seedUsers:User)-[:FOLLOWS]->(allFollowed:User)
-            WITH collect(allFollowed) as allFollowedUsers, collect(seedUsers) as seedUsers
-            MATCH (seedUser)-[r:FOLLOWS]->(allF)
-            WHERE (allF in allFollowedUsers and seedUser in seedUsers)
-            WITH collect(endNode(r)) as endingEnders
-            return apoc.coll.duplicatesWithCount(endingEnders) as u;
+            MATCH (s:Stream {name: $name})-[:CONTAINS]->(seedUser:User)-[:FOLLOWS]->(followed:User)
+            WITH followed, count(DISTINCT seedUser) AS count
+            WHERE count > 1
+            RETURN collect({item: followed, count: count}) AS u;
         `,
             { name: name })
     })
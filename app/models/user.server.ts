@@ -7,7 +7,7 @@ export type { users } from "@prisma/client";
 import type { users } from "@prisma/client";
 import { log } from '~/log.server';
 
-import { driver } from "~/neo4j.server";
+import { driver, database } from "~/neo4j.server";
 import { Record } from 'neo4j-driver'
 
 
@@ -20,12 +20,13 @@ export function flattenTwitterUserPublicMetrics(data: Array<any>) {
     obj["public_metrics.listed_count"] = obj.public_metrics.listed_count;
     delete obj.public_metrics;
     delete obj.entities;
+    delete obj.withheld;
   }
   return data;
 }
 
 export async function getUserByUsernameDB(username: string) {
-  const session = driver.session()
+  const session = driver.session({ database })
   const res = await session.writeTransaction((tx: any) => {
     return tx.run(`
       MATCH (u:User {username: $username})
@@ -46,11 +47,11 @@ export async function getUserByUsernameDB(username: string) {
 }
 
 export async function createUserDb(user: any) {
-  const session = driver.session()
+  const session = driver.session({ database })
   const res = await session.writeTransaction((tx: any) => {
     return tx.run(`
-      MERGE (u:User {username: $user.username})
-      SET u = $user
+      MERGE (u:User {id: $user.id})
+      SET u = $user, u.username = toLower($user.username)
       RETURN u`,
       { user: user }
     )
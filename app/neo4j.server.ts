@@ -1,44 +1,111 @@
 import neo4j, { Driver, Session } from 'neo4j-driver'
+import { log } from '~/log.server';
 // import { int, isInt } from 'neo4j-driver'
 
 let driver: Driver;
 
-// declare global {
-//     var __neo4jClient__: Driver;
-// }
+// Naming the database up front saves the server round-trip the driver otherwise
+// makes to resolve the user's home database on every new session
+const database = process.env.NEO4J_DATABASE || undefined;
+
+declare global {
+    var __neo4jClient__: Driver;
+}
+
+// An empty or malformed value falls back to the default, a pool of 0 would fail every session
+function positiveIntFromEnv(name: string, fallback: number) {
+    const value = parseInt(process.env[name] ?? '', 10)
+    return value > 0 ? value : fallback
+}
+
+function initDriver(uri: string, username: string, password: string) {
+    // Bound the pool and fail fast when it is exhausted instead of queueing
+    // requests for the driver's default of 60 seconds
+    const client = neo4j.driver(uri, neo4j.auth.basic(username, password), {
+        maxConnectionPoolSize: positiveIntFromEnv('NEO4J_MAX_CONNECTION_POOL_SIZE', 50),
+        connectionAcquisitionTimeout: positiveIntFromEnv('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', 10000),
+    })
+
+    // Verify connectivity eagerly, the driver pools its own connections
+    client.verifyConnectivity()
+        .then(() => ensureConstraints(client))
+        .catch((e) => log.error(`failed to connect to neo4j: ${e}`))
+
+    return client
+}
+
+// Uniqueness constraints and indexes back the keys used by MERGE and MATCH so
+// that each lookup is an index seek instead of a label scan
+const CONSTRAINTS = [
+    'CREATE CONSTRAINT user_id IF NOT EXISTS FOR (u:User) REQUIRE u.id IS UNIQUE',
+    'CREATE CONSTRAINT tweet_id IF NOT EXISTS FOR (t:Tweet) REQUIRE t.id IS UNIQUE',
+    'CREATE CONSTRAINT stream_name IF NOT EXISTS FOR (s:Stream) REQUIRE s.name IS UNIQUE',
+    'CREATE CONSTRAINT media_key IF NOT EXISTS FOR (m:Media) REQUIRE m.media_key IS UNIQUE',
+    'CREATE CONSTRAINT link_url IF NOT EXISTS FOR (l:Link) REQUIRE l.url IS UNIQUE',
+    'CREATE CONSTRAINT hashtag_tag IF NOT EXISTS FOR (h:Hashtag) REQUIRE h.tag IS UNIQUE',
+    'CREATE CONSTRAINT cashtag_tag IF NOT EXISTS FOR (c:Cashtag) REQUIRE c.tag IS UNIQUE',
+    // usernames are looked up but not unique, an account can be renamed
+    'CREATE INDEX user_username IF NOT EXISTS FOR (u:User) ON (u.username)',
+    'CREATE INDEX annotation_key IF NOT EXISTS FOR (a:Annotation) ON (a.normalized_text, a.type, a.probability)',
+]
+
+// Graphs written before users were merged on their id can hold one User node
+// per username casing for the same account, which would make the user_id
+// constraint fail. Fold those duplicates together and lowercase usernames
+// first. Both statements are no-ops once the graph is clean.
+const USER_MIGRATIONS = [
+    `MATCH (u:User) WHERE u.id IS NOT NULL
+    WITH u.id AS id, collect(u) AS nodes
+    WHERE size(nodes) > 1
+    CALL apoc.refactor.mergeNodes(nodes, {properties: 'overwrite', mergeRels: true}) YIELD node
+    RETURN count(node) AS merged`,
+    `MATCH (u:User) WHERE u.username <> toLower(u.username)
+    SET u.username = toLower(u.username)`,
+]
+
+async function ensureConstraints(client: Driver) {
+    const session = client.session({ database })
+    try {
+        for (const migration of USER_MIGRATIONS) {
+            await session.run(migration)
+                .catch((e) => log.error(`failed to migrate neo4j users: ${e}`))
+        }
+        for (const constraint of CONSTRAINTS) {
+            // schema changes cannot share a transaction with each other
+            await session.run(constraint)
+                .catch((e) => log.error(
+                    `failed to ensure neo4j constraint '${constraint}': ${e}. ` +
+                    `MERGE and MATCH on this key fall back to label scans until it is fixed`
+                ))
+        }
+    } finally {
+        await session.close()
+    }
+}
 
 // this is needed because in development we don't want to restart
 // the server with every change, but we want to make sure we don't
 // create a new connection to the DB with every change either.
 // in production we'll have a single connection to the DB.
-// if (process.env.NODE_ENV === "production") {
-//     driver = initDriver(
-//         process.env.NEO4J_URI,
-//         process.env.NEO4J_USERNAME,
-//         process.env.NEO4J_PASSWORD
-//     );
-// } else {
-//     if (!global.__db__) {
-//         global.__neo4jClient__ = initDriver();
-//     }
-//     driver = global.__neo4jClient__;
-// }
-
-function initDriver(uri: string, username: string, password: string) {
-    driver = neo4j.driver(uri, neo4j.auth.basic(username, password))
-
-    // Verify connectivity
-    return driver.verifyConnectivity()
-        // Resolve with an instance of the driver
-        .then(() => driver)
+if (process.env.NODE_ENV === "production") {
+    driver = initDriver(
+        process.env.NEO4J_URI,
+        process.env.NEO4J_USERNAME,
+        process.env.NEO4J_PASSWORD
+    );
+} else {
+    if (!global.__neo4jClient__) {
+        global.__neo4jClient__ = initDriver(
+            process.env.NEO4J_URI,
+            process.env.NEO4J_USERNAME,
+            process.env.NEO4J_PASSWORD
+        );
+    }
+    driver = global.__neo4jClient__;
 }
+
 export function closeDriver() {
     return driver && driver.close()
 }
 
-initDriver(
-    process.env.NEO4J_URI,
-    process.env.NEO4J_USERNAME,
-    process.env.NEO4J_PASSWORD
-);
-export { driver };
\ No newline at end of file
+export { driver, database };
@@ -39,10 +39,11 @@ export async function action({ request }: ActionArgs) {
     }
     const meData = await api.v2.me({ "user.fields": "created_at,description,entities,id,location,name,pinned_tweet_id,profile_image_url,protected,public_metrics,url,username,verified,withheld", });
     user = meData.data;
-    let username = user.username;
+    // usernames are stored lowercased, see createUserDb
+    let username = user.username.toLowerCase();
     let userDb = await getUserByUsernameDB(username)
     if (!userDb) {
-        createUserDb(flattenTwitterUserPublicMetrics([user])[0])
+        await createUserDb(flattenTwitterUserPublicMetrics([user])[0])
     }
     const startTime = "2022-08-24T13:58:40Z";
     const endTime = "2022-08-31T13:58:40Z";
@@ -4,7 +4,7 @@ import { json } from "@remix-run/node";
 import { Form, Link, NavLink, Outlet, useLoaderData } from "@remix-run/react";
 import invariant from "tiny-invariant";
 import { Record } from 'neo4j-driver'
-import { driver } from "~/neo4j.server";
+import { driver, database } from "~/neo4j.server";
 
 import { getTweet } from "~/models/tweets.server";
 
@@ -15,7 +15,7 @@ type LoaderData = {
 
 async function readTweets(driver: any) {
     // Create a Session for the `people` database
-    const session = driver.session()
+    const session = driver.session({ database })
 
     // Create a node within a write transaction
     const res = await session.writeTransaction((tx: any) => {
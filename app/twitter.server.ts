@@ -72,6 +72,10 @@ export const TWEET_EXPANSIONS: TTweetv2Expansion[] = [
     'entities.mentions.username',
 ];
 
+// Refresh access tokens this long before they expire so that a request doesn't
+// start with a token that runs out while it is talking to Twitter
+const TOKEN_EXPIRY_MARGIN_MS = 60 * 1000;
+
 export function handleTwitterApiError(e: unknown): never {
     if (e instanceof ApiResponseError && e.rateLimitError && e.rateLimit) {
         const msg1 =
@@ -107,9 +111,9 @@ export async function getTwitterClientForUser(
     //     new TwitterApiRateLimitDBStore(uid)
     // );
     let api = new TwitterApi(token.access_token)//, { plugins: [limits] });
-    if (expiration < new Date().valueOf()) {
+    if (expiration - TOKEN_EXPIRY_MARGIN_MS < new Date().valueOf()) {
         log.info(
-            `User (${uid}) access token expired at ${new Date(
+            `User (${uid}) access token expires at ${new Date(
                 expiration
             ).toLocaleString('en-US')}, refreshing...`
         );